@@ -4,12 +4,18 @@ A ChatGPT-like chatbot powered by Groq's LLaMA 4 with web search capabilities
 """
 
 import os
-import json
-import uuid
+import queue
+import atexit
 import logging
-from datetime import datetime
-from flask import Flask, request, jsonify, Response, stream_with_context
+from logging.handlers import QueueHandler, QueueListener
+import orjson
+from datetime import datetime, timezone
+from flask import Flask, request, jsonify, Response, stream_with_context, send_from_directory, abort
+from flask.json.provider import JSONProvider
+from werkzeug.exceptions import HTTPException
 from flask_cors import CORS
+from flask_compress import Compress
+from whitenoise import WhiteNoise
 
 from config import Config
 from web_search import search_web
@@ -21,39 +27,128 @@ Config.validate()
 # Get project root (parent of backend folder)
 BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(BACKEND_DIR)
+FRONTEND_DIR = os.path.join(PROJECT_ROOT, 'frontend')
 
-# Setup Flask to serve static files from project root
-app = Flask(__name__, 
-            static_folder=PROJECT_ROOT,
-            static_url_path='')
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson for faster jsonify/request.json"""
+
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response instead of
+        # decoding to str and re-encoding
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+# Static assets are served by WhiteNoise below, not Flask's static route
+app = Flask(__name__, static_folder=None)
+app.json = ORJSONProvider(app)
+app.config['MAX_CONTENT_LENGTH'] = Config.MAX_REQUEST_BYTES
+# Compress JSON API responses only; SSE streams must reach the client
+# token by token, so text/event-stream and streamed bodies are excluded
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_STREAMS'] = False
+Compress(app)
 CORS(app)
 
-# Configure logging
+# WhiteNoise serves frontend/ before requests reach Flask, using the
+# server's file wrapper (sendfile) and caching headers. Only the frontend
+# folder is exposed, not the whole project root. In debug, re-scan files on
+# each request so edited assets aren't served with stale headers.
+app.wsgi_app = WhiteNoise(app.wsgi_app, autorefresh=Config.DEBUG)
+app.wsgi_app.add_files(FRONTEND_DIR, prefix='frontend/')
+
+# Configure logging; request threads only enqueue records and a background
+# listener writes them, so handlers never block on stderr
+_log_queue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_listener = QueueListener(_log_queue, _log_handler)
+# QueueHandler bakes its formatted text into the record; keep that to the bare
+# message so only the listener's handler applies the real format
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
 logging.basicConfig(
-    level=getattr(logging, Config.LOG_LEVEL), 
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    level=getattr(logging, Config.LOG_LEVEL),
+    handlers=[_queue_handler]
 )
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
+
+@app.before_request
+def reject_oversized_body():
+    """Refuse oversized uploads before anything reads the body"""
+    if request.content_length and request.content_length > Config.MAX_REQUEST_BYTES:
+        abort(413)
+
+
+@app.errorhandler(HTTPException)
+def api_http_error(e):
+    """Report HTTP errors from API routes in the same JSON shape as the routes' own errors"""
+    if not request.path.startswith('/api/'):
+        return e
+    return jsonify({"error": e.description}), e.code
+
+
+def _get_json():
+    """
+    Parse the request body with orjson without caching the raw bytes.
+    Call it outside the routes' catch-all handlers: a malformed body aborts
+    with 400 and a chunked body over MAX_CONTENT_LENGTH with 413.
+    """
+    raw = request.get_data(cache=False)
+    if not raw:
+        return {}
+    if len(raw) >= Config.MAX_REQUEST_BYTES:
+        # Chunked bodies carry no Content-Length; Werkzeug stops reading at the
+        # limit rather than raising, so a body that fills it was cut short
+        abort(413)
+    try:
+        data = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        abort(400, description="Invalid JSON")
+    return data if isinstance(data, dict) else {}
+
+
 # ========== FRONTEND ROUTES ==========
 
 @app.route('/')
 def serve_index():
     """Serve main index.html"""
-    return app.send_static_file('index.html')
+    return send_from_directory(PROJECT_ROOT, 'index.html')
 
 
 # ========== HEALTH CHECK ==========
 
-@app.route('/api/health', methods=['GET'])
-def health():
-    """Health check endpoint"""
-    return jsonify({
+# Health payloads are constant apart from the storage backend, so
+# serialize both variants once instead of on every probe
+_HEALTH_BODIES = {
+    persistent: orjson.dumps({
         "status": "ok",
         "model": Config.MODEL,
-        "database": "supabase" if chat_service.use_persistent_storage() else "memory",
+        "database": "supabase" if persistent else "memory",
         "web_search": Config.WEB_SEARCH_ENABLED
     })
+    for persistent in (True, False)
+}
+
+
+@app.route('/api/health', methods=['GET'])
+def health():
+    """Health check endpoint"""
+    body = _HEALTH_BODIES[chat_service.use_persistent_storage()]
+    return app.response_class(body, mimetype='application/json')
 
 
 # ========== CHAT API ==========
@@ -64,8 +159,8 @@ def chat():
     Send a message and get AI response.
     Supports streaming for real-time responses.
     """
+    data = _get_json()
     try:
-        data = request.json or {}
         user_message = data.get('message', '').strip()
         conversation_id = data.get('conversation_id')
         stream = data.get('stream', False)
@@ -96,8 +191,8 @@ def chat():
 @app.route('/api/search', methods=['POST'])
 def search():
     """Direct web search endpoint"""
+    data = _get_json()
     try:
-        data = request.json or {}
         query = data.get('query', '').strip()
         
         if not query:
@@ -119,15 +214,39 @@ def search():
 
 @app.route('/api/conversations', methods=['GET'])
 def get_conversations():
-    """Get list of all conversations"""
+    """Get list of all conversations, newest first; pass ?before=<updated_at>&before_id=<id> for the next page"""
+    before = request.args.get('before') or None
+    if before is not None:
+        try:
+            before = datetime.fromisoformat(before)
+        except ValueError:
+            return jsonify({"error": "Invalid 'before' timestamp"}), 400
+        if before.tzinfo is None:
+            before = before.replace(tzinfo=timezone.utc)
     try:
-        conversations = chat_service.get_all_conversations()
+        limit = max(1, min(request.args.get('limit', 50, type=int), 100))
+        before_id = request.args.get('before_id') or None
+        conversations = chat_service.get_all_conversations(limit, before, before_id)
         return jsonify({"conversations": conversations})
     except Exception as e:
         logger.error(f"Get conversations error: {e}", exc_info=True)
         return jsonify({"error": "Failed to fetch conversations"}), 500
 
 
+# Transcripts this long are streamed one message at a time instead of being
+# serialized into a single buffer (smaller ones stay buffered and compressed)
+STREAM_CONVERSATION_MIN_MESSAGES = 500
+
+
+def _iter_conversation_json(conversation):
+    """Yield a conversation as JSON, serializing its messages one by one"""
+    head = orjson.dumps({k: v for k, v in conversation.items() if k != "messages"})
+    yield head[:-1] + (b',"messages":[' if len(head) > 2 else b'"messages":[')
+    for i, message in enumerate(conversation["messages"]):
+        yield (b',' if i else b'') + orjson.dumps(message)
+    yield b']}'
+
+
 @app.route('/api/conversations/<conversation_id>', methods=['GET'])
 def get_single_conversation(conversation_id):
     """Get a specific conversation with all messages"""
@@ -135,6 +254,11 @@ def get_single_conversation(conversation_id):
         conversation = chat_service.get_conversation(conversation_id)
         if not conversation:
             return jsonify({"error": "Conversation not found"}), 404
+        if len(conversation["messages"]) >= STREAM_CONVERSATION_MIN_MESSAGES:
+            return Response(
+                stream_with_context(_iter_conversation_json(conversation)),
+                mimetype='application/json'
+            )
         return jsonify(conversation)
     except Exception as e:
         logger.error(f"Get conversation error: {e}", exc_info=True)
@@ -144,8 +268,8 @@ def get_single_conversation(conversation_id):
 @app.route('/api/conversations/<conversation_id>', methods=['PUT'])
 def update_conversation(conversation_id):
     """Update a conversation (edit messages)"""
+    data = _get_json()
     try:
-        data = request.json or {}
         conversation = chat_service.get_conversation(conversation_id)
         
         if not conversation:
@@ -191,6 +315,7 @@ def clear_all_conversations_endpoint():
 
 # ========== RUN ==========
 
+# Development server only; use gunicorn with gunicorn.conf.py in production
 if __name__ == '__main__':
     db_status = "Supabase (persistent)" if chat_service.use_persistent_storage() else "Memory (session only)"
     search_status = "Enabled" if Config.WEB_SEARCH_ENABLED else "Disabled"
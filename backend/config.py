@@ -19,6 +19,27 @@ class Config:
     # AI Model
     MODEL = 'meta-llama/llama-4-scout-17b-16e-instruct'
     
+    # Upper bound on generated tokens per completion
+    MAX_TOKENS = int(os.environ.get('MAX_TOKENS', 2048))
+    
+    # Max milliseconds to hold streamed tokens before sending an SSE frame
+    SSE_COALESCE_MS = int(os.environ.get('SSE_COALESCE_MS', 20))
+    
+    # Cache replies to identical conversations (seconds; 0 disables)
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 600))
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 1024))
+    
+    # Cache non-empty web search results (seconds; 0 disables)
+    SEARCH_CACHE_TTL = int(os.environ.get('SEARCH_CACHE_TTL', 900))
+    SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', 512))
+    
+    # Server processes sharing the database (set by gunicorn.conf.py); with more
+    # than one, saves wait for the Supabase write instead of writing behind
+    WORKERS = int(os.environ.get('VERITAS_WORKERS', 1))
+    
+    # Largest request body accepted by the API (bytes)
+    MAX_REQUEST_BYTES = int(os.environ.get('MAX_REQUEST_BYTES', 1_000_000))
+    
     # Web search enabled
     WEB_SEARCH_ENABLED = True
     
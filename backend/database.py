@@ -5,31 +5,61 @@ Handles persistent storage of conversations
 
 import os
 import logging
+import threading
+import httpx
 from datetime import datetime
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
 # Initialize Supabase client
 _supabase: Client | None = None
+_supabase_lock = threading.Lock()
+# Set once SUPABASE_URL/KEY are found missing, so later calls skip the env lookups
+_supabase_unconfigured = False
+
+# Bounded keep-alive pool for PostgREST calls, shared by all request threads
+SUPABASE_CONNECTION_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+SUPABASE_TIMEOUT = httpx.Timeout(10.0)
+
+# Most rows sent in a single upsert request
+UPSERT_CHUNK_SIZE = 500
 
 def get_supabase() -> Client | None:
     """Get or create Supabase client"""
-    global _supabase
+    global _supabase, _supabase_unconfigured
+    
+    # Fast path for every call after the first; the env doesn't change at runtime
+    if _supabase is not None:
+        return _supabase
+    if _supabase_unconfigured:
+        return None
     
     url = os.environ.get('SUPABASE_URL')
     key = os.environ.get('SUPABASE_KEY')
     
     if not url or not key:
+        _supabase_unconfigured = True
         return None
     
-    if _supabase is None:
-        try:
-            _supabase = create_client(url, key)
-        except Exception as e:
-            logger.error(f"Failed to connect to Supabase: {e}", exc_info=True)
-            return None
+    # Lock so concurrent first requests don't each build a client and pool
+    with _supabase_lock:
+        if _supabase is None:
+            http_client = None
+            try:
+                http_client = httpx.Client(
+                    limits=SUPABASE_CONNECTION_LIMITS,
+                    timeout=SUPABASE_TIMEOUT,
+                    follow_redirects=True
+                )
+                _supabase = create_client(url, key, options=ClientOptions(httpx_client=http_client))
+            except Exception as e:
+                logger.error(f"Failed to connect to Supabase: {e}", exc_info=True)
+                # Don't leak the pool; the next call builds a fresh one
+                if http_client is not None:
+                    http_client.close()
+                return None
     
     return _supabase
 
@@ -41,26 +71,39 @@ def is_supabase_available() -> bool:
 
 # ========== CONVERSATIONS ==========
 
-def save_conversation(conversation_id: str, title: str, messages: list) -> bool:
-    """Save or update a conversation in Supabase"""
+def save_conversations_bulk(conversations: list[dict]) -> list[str]:
+    """
+    Save or update many conversations (id, title, messages, updated_at),
+    one upsert per chunk of rows.
+    Returns the ids that were not written (empty when everything was saved).
+    """
     supabase = get_supabase()
     if not supabase:
-        return False
+        return [conv["id"] for conv in conversations]
     
-    try:
-        data = {
-            "id": conversation_id,
-            "title": title,
-            "messages": messages,
-            "updated_at": datetime.utcnow().isoformat()
+    # updated_at is the save time ChatService assigned; it is what readers see
+    # in pending snapshots and what the list's pagination cursor refers to
+    rows = [
+        {
+            "id": conv["id"],
+            "title": conv["title"],
+            "messages": conv["messages"],
+            "updated_at": conv["updated_at"]
         }
-        
-        # Upsert (insert or update)
-        supabase.table("conversations").upsert(data).execute()
-        return True
-    except Exception as e:
-        logger.error(f"Error saving conversation: {e}", exc_info=True)
-        return False
+        for conv in conversations
+    ]
+    
+    # Upsert (insert or update); chunked to stay well under request size limits.
+    # Each chunk is its own request, so a failure only loses that chunk's rows
+    failed = []
+    for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        chunk = rows[i:i + UPSERT_CHUNK_SIZE]
+        try:
+            supabase.table("conversations").upsert(chunk).execute()
+        except Exception as e:
+            logger.error(f"Error saving {len(chunk)} conversations: {e}", exc_info=True)
+            failed.extend(row["id"] for row in chunk)
+    return failed
 
 
 def get_conversation(conversation_id: str) -> dict | None:
@@ -77,14 +120,28 @@ def get_conversation(conversation_id: str) -> dict | None:
         return None
 
 
-def get_all_conversations(limit: int = 50) -> list:
-    """Get all conversations, ordered by most recent"""
+def get_all_conversations(limit: int = 50, before: datetime | None = None, before_id: str | None = None) -> list:
+    """Get all conversations, ordered by most recent (optionally only those after a (updated_at, id) cursor)"""
     supabase = get_supabase()
     if not supabase:
         return []
     
     try:
-        result = supabase.table("conversations").select("id, title, updated_at").order("updated_at", desc=True).limit(limit).execute()
+        query = supabase.table("conversations").select("id, title, updated_at")
+        if before is not None:
+            # Keyset pagination: continue after the last row of the previous page;
+            # the id breaks ties between rows saved in the same microsecond
+            ts = before.isoformat()
+            if before_id:
+                query = query.or_(f'updated_at.lt."{ts}",and(updated_at.eq."{ts}",id.lt."{before_id}")')
+            else:
+                query = query.lt("updated_at", ts)
+        result = (
+            query.order("updated_at", desc=True)
+            .order("id", desc=True)
+            .limit(limit)
+            .execute()
+        )
         return result.data or []
     except Exception as e:
         logger.error(f"Error getting conversations: {e}", exc_info=True)
@@ -111,6 +168,13 @@ def clear_all_conversations() -> bool:
     if not supabase:
         return False
     
+    try:
+        supabase.rpc("truncate_conversations").execute()
+        return True
+    except Exception as e:
+        # Function not installed (see migrations/001_truncate_conversations.sql)
+        logger.warning(f"truncate_conversations RPC failed, deleting rows instead: {e}")
+    
     try:
         # Delete all rows (Supabase requires a filter, so we use a workaround)
         supabase.table("conversations").delete().neq("id", "").execute()
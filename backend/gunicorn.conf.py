@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration for Veritas Chatbot
+Run from the backend folder: gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+import multiprocessing
+from dotenv import load_dotenv
+
+# Load .env file
+load_dotenv()
+
+bind = f"{os.environ.get('HOST', '127.0.0.1')}:{os.environ.get('PORT', 5000)}"
+
+# Without Supabase, conversations live in per-process memory, so only
+# scale out to multiple workers when storage is shared
+if os.environ.get('SUPABASE_URL') and os.environ.get('SUPABASE_KEY'):
+    workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+else:
+    workers = 1
+
+# Tell the app how many processes share the database (see Config.WORKERS);
+# workers are forked after this runs, so they inherit it
+os.environ['VERITAS_WORKERS'] = str(workers)
+
+# Threaded workers keep many Groq calls and SSE streams in flight at once
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+# Streams and web searches can run long; keep workers alive for them
+timeout = 120
+keepalive = 5
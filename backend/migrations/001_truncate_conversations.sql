@@ -0,0 +1,13 @@
+-- Lets clear_all_conversations() empty the table with TRUNCATE (one
+-- metadata operation) instead of a filtered DELETE that touches every row.
+-- TRUNCATE is not subject to row level security, so only the backend's
+-- service_role may call this; it must not be reachable with the anon key.
+create or replace function truncate_conversations()
+returns void
+language sql
+as $$
+    truncate table conversations;
+$$;
+
+revoke execute on function truncate_conversations() from public, anon, authenticated;
+grant execute on function truncate_conversations() to service_role;
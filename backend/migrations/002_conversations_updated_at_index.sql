@@ -0,0 +1,4 @@
+-- Serves the conversation list (order by updated_at desc, id desc limit N) and its
+-- "before" keyset pages as an index range scan instead of sort-and-limit.
+create index if not exists conversations_updated_at_idx
+    on conversations (updated_at desc, id desc);
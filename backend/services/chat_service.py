@@ -6,20 +6,29 @@ Handles the core logic for chatting with the AI, including:
 - Streaming and synchronous responses
 """
 
-import json
 import uuid
 import re
+import time
+import hashlib
 import logging
-from datetime import datetime
-from groq import Groq
+import threading
+import httpx
+import orjson
+from collections import OrderedDict
+from itertools import islice
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
+from groq import Groq, DefaultHttpxClient
 
 from config import Config
 from web_search import search_web, format_search_results
+from singleflight import SingleFlight
 
 # Try to import database module
 try:
     from database import (
-        is_supabase_available, save_conversation, get_conversation as db_get_conversation,
+        is_supabase_available, save_conversations_bulk, get_conversation as db_get_conversation,
         get_all_conversations, delete_conversation as db_delete_conversation, clear_all_conversations
     )
     USE_DATABASE = True
@@ -28,17 +37,124 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Groq connection pool: keep enough idle TLS connections around for every
+# request thread, and keep them long enough to span a user's think time
+GROQ_CONNECTION_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=32,
+    keepalive_expiry=60
+)
+
+# Matches a "[SEARCH: query]" request in an AI response
+SEARCH_REQUEST_RE = re.compile(r'\[SEARCH:\s*(.+?)\]', re.IGNORECASE)
+
+# Shown to the user while a web search runs mid-stream
+SEARCHING_NOTICE = "\n\n🔍 *Searching the web...*\n\n"
+
+# System messages never change at runtime, so build them once and reuse
+# the same objects for every request
+SYSTEM_MESSAGE = {"role": "system", "content": Config.SYSTEM_PROMPT}
+SEARCH_SYSTEM_MESSAGE = {"role": "system", "content": Config.SEARCH_CONTEXT_PROMPT}
+
+
+# SSE comment sent first so browsers and proxies start delivering the
+# stream right away instead of waiting to fill a buffer
+SSE_PREAMBLE = b":" + b" " * 2048 + b"\n\n"
+
+
+# Flush buffered stream text once it reaches this many characters
+SSE_COALESCE_CHARS = 64
+
+
+def utc_now_iso() -> str:
+    """Current UTC time as an ISO 8601 string"""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _cursor_key(conv: dict) -> tuple:
+    """(updated_at, id) of a conversation, the order conversation pages are listed in"""
+    return datetime.fromisoformat(conv["updated_at"]), conv["id"]
+
+
+def sse_event(payload: dict) -> bytes:
+    """Encode a payload as a server-sent event frame"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+def iter_content(stream):
+    """Yield the non-empty text deltas of a Groq completion stream"""
+    for chunk in stream:
+        content = chunk.choices[0].delta.content
+        if content:
+            yield content
+
+
+def coalesce(deltas, max_chars: int = SSE_COALESCE_CHARS, max_wait_ms: int = Config.SSE_COALESCE_MS):
+    """
+    Group small text deltas into larger pieces so each SSE frame carries
+    more than a token or two. A piece is flushed once it reaches max_chars
+    or max_wait_ms has passed since the last flush, and at the end.
+    """
+    max_wait = max_wait_ms / 1000
+    buffer = []
+    size = 0
+    last_flush = time.monotonic()
+    
+    for delta in deltas:
+        buffer.append(delta)
+        size += len(delta)
+        now = time.monotonic()
+        if size >= max_chars or now - last_flush >= max_wait:
+            yield "".join(buffer)
+            buffer.clear()
+            size = 0
+            last_flush = now
+    
+    if buffer:
+        yield "".join(buffer)
+
+
 class ChatService:
     def __init__(self):
-        self.client = None
-        # In-memory storage fallback
-        self.memory_conversations = {}
-
-    def get_client(self):
-        """Get or create Groq client"""
-        if self.client is None:
-            self.client = Groq(api_key=Config.GROQ_API_KEY)
-        return self.client
+        # One long-lived Groq client so its HTTP connection pool is shared
+        self.client = Groq(
+            api_key=Config.GROQ_API_KEY,
+            http_client=DefaultHttpxClient(limits=GROQ_CONNECTION_LIMITS)
+        )
+        # In-memory storage fallback, kept in least- to most-recently-updated order
+        self.memory_conversations = OrderedDict()
+        # Guards memory_conversations; every operation under it is O(1) or a
+        # bounded scan, so one lock is cheap and keeps the update order intact
+        self._memory_lock = threading.Lock()
+        # Supabase writes run on one background thread so chat responses don't
+        # wait on them; a single worker keeps writes in submission order
+        self._persist_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='veritas-persist')
+        # Latest snapshot of each conversation whose write hasn't landed yet,
+        # served to readers in this process so they never see an older DB copy
+        self._pending_saves = {}
+        # Conversations waiting for the next queued flush; further saves only
+        # replace the snapshot, and one flush writes them all in a bulk upsert
+        self._flush_scheduled = set()
+        # Most recently submitted flush; while it hasn't started it will pick
+        # up anything added to _flush_scheduled
+        self._queued_flush = None
+        self._pending_lock = threading.Lock()
+        # Replies keyed by a hash of the conversation so far, so an identical
+        # prompt (e.g. the same opening message) skips the model entirely
+        self._response_cache = TTLCache(maxsize=Config.RESPONSE_CACHE_SIZE, ttl=Config.RESPONSE_CACHE_TTL)
+        self._response_cache_lock = threading.Lock()
+        # Identical in-flight chat_sync requests share one Groq call
+        self._reply_flight = SingleFlight()
+        # Open the Groq connection in the background so the first chat
+        # doesn't pay for DNS and the TLS handshake
+        threading.Thread(target=self._warm_up_client, name='veritas-groq-warmup', daemon=True).start()
+
+    def _warm_up_client(self):
+        """Make a cheap Groq call to establish a pooled connection"""
+        try:
+            self.client.with_options(max_retries=0).models.list()
+        except Exception as e:
+            logger.debug(f"Groq warm-up failed: {e}")
 
     def use_persistent_storage(self):
         """Check if we should use persistent storage"""
@@ -50,18 +166,72 @@ class ChatService:
             return None
             
         if self.use_persistent_storage():
+            with self._pending_lock:
+                pending = self._pending_saves.get(conversation_id)
+            if pending:
+                return {**pending, "messages": list(pending["messages"])}
             return db_get_conversation(conversation_id)
         else:
-            return self.memory_conversations.get(conversation_id)
+            with self._memory_lock:
+                conversation = self.memory_conversations.get(conversation_id)
+                if conversation is None:
+                    return None
+                # Callers append to the message list, so hand out a private copy
+                return {**conversation, "messages": list(conversation["messages"])}
 
     def save_conversation(self, conversation):
         """Save conversation to DB or memory"""
-        conversation["updated_at"] = datetime.utcnow().isoformat()
+        conversation["updated_at"] = utc_now_iso()
         
         if self.use_persistent_storage():
-            save_conversation(conversation["id"], conversation["title"], conversation["messages"])
+            conversation_id = conversation["id"]
+            snapshot = {**conversation, "messages": list(conversation["messages"])}
+            with self._pending_lock:
+                self._pending_saves[conversation_id] = snapshot
+                flush = self._queued_flush
+                # Checked under the lock, so a not-yet-started flush is sure to
+                # see this id when it takes the scheduled set
+                if flush is None or flush.running() or flush.done():
+                    flush = self._queued_flush = self._persist_pool.submit(self._flush_pending)
+                self._flush_scheduled.add(conversation_id)
+            if Config.WORKERS > 1:
+                # Pending snapshots are per process; another worker handling the
+                # next turn would read the stale row and overwrite this one
+                if conversation_id in flush.result():
+                    raise RuntimeError(f"Failed to save conversation {conversation_id}")
         else:
-            self.memory_conversations[conversation["id"]] = conversation.copy()
+            snapshot = {**conversation, "messages": list(conversation["messages"])}
+            with self._memory_lock:
+                self.memory_conversations[conversation["id"]] = snapshot
+                self.memory_conversations.move_to_end(conversation["id"])
+
+    def _flush_pending(self) -> set:
+        """
+        Write the latest snapshot of every scheduled conversation to Supabase
+        (runs on the persist thread). Returns the ids that failed to write.
+        """
+        with self._pending_lock:
+            scheduled, self._flush_scheduled = self._flush_scheduled, set()
+            # Conversations deleted before the write ran have no snapshot
+            snapshots = [self._pending_saves[cid] for cid in scheduled if cid in self._pending_saves]
+        if not snapshots:
+            return set()
+        
+        failed = set(save_conversations_bulk(snapshots))
+        with self._pending_lock:
+            for snapshot in snapshots:
+                conversation_id = snapshot["id"]
+                if conversation_id in failed:
+                    # Keep it pending and retry with the next flush (unless it
+                    # was deleted meanwhile)
+                    if conversation_id in self._pending_saves:
+                        self._flush_scheduled.add(conversation_id)
+                elif self._pending_saves.get(conversation_id) is snapshot:
+                    # A newer snapshot may have arrived meanwhile; leave that one pending
+                    del self._pending_saves[conversation_id]
+        if failed:
+            logger.warning(f"{len(failed)} conversation(s) not saved; retrying on the next save")
+        return failed
 
     def create_conversation(self, initial_message: str):
         """Create a new conversation"""
@@ -70,53 +240,94 @@ class ChatService:
             "id": conversation_id,
             "title": initial_message[:50] + "..." if len(initial_message) > 50 else initial_message,
             "messages": [],
-            "updated_at": datetime.utcnow().isoformat()
+            "updated_at": utc_now_iso()
         }
         return conversation
 
+    def _start_turn(self, user_message: str, conversation_id: str = None) -> dict:
+        """Get or create the conversation and append the user's message"""
+        conversation = self.get_conversation(conversation_id) if conversation_id else None
+        if not conversation:
+            conversation = self.create_conversation(user_message)
+
+        conversation["messages"].append({
+            "role": "user",
+            "content": user_message
+        })
+        return conversation
+
+    def _build_search_context(self, user_message: str, search_query: str, search_results: list[dict]) -> str:
+        """Build the prompt that hands web search results to the AI"""
+        formatted_results = format_search_results(search_results)
+        return f"""The user asked: "{user_message}"
+
+I searched the web for: "{search_query}"
+
+{formatted_results}
+
+Based on these search results, please provide a helpful and accurate response to the user's question. 
+Cite sources when appropriate."""
+
+    def _response_cache_key(self, messages: list) -> bytes:
+        """Hash the roles and contents of a conversation into a cache key"""
+        history = [(m["role"], m["content"]) for m in messages]
+        return hashlib.blake2b(orjson.dumps(history), digest_size=16).digest()
+
+    def _get_cached_response(self, key: bytes) -> str | None:
+        """Return a cached reply for this conversation state, if any"""
+        if Config.RESPONSE_CACHE_TTL <= 0:
+            return None
+        with self._response_cache_lock:
+            return self._response_cache.get(key)
+
+    def _cache_response(self, key: bytes, response: str, search_used: bool):
+        """Cache a reply unless it came from (or asked for) a web search, which is time-sensitive"""
+        if Config.RESPONSE_CACHE_TTL <= 0 or search_used or self._extract_search_query(response):
+            return
+        with self._response_cache_lock:
+            self._response_cache[key] = response
+
     def _extract_search_query(self, response: str) -> str | None:
         """Extract search query from AI response if it requests a search"""
-        match = re.search(r'\[SEARCH:\s*(.+?)\]', response, re.IGNORECASE)
+        match = SEARCH_REQUEST_RE.search(response)
         if match:
             return match.group(1).strip()
         return None
 
     def _get_ai_response(self, messages: list, use_search_context: bool = False) -> str:
         """Get a non-streaming response from the AI"""
-        groq = self.get_client()
-        system_prompt = Config.SEARCH_CONTEXT_PROMPT if use_search_context else Config.SYSTEM_PROMPT
+        groq = self.client
+        system_message = SEARCH_SYSTEM_MESSAGE if use_search_context else SYSTEM_MESSAGE
         
-        full_messages = [{"role": "system", "content": system_prompt}] + messages
+        full_messages = [system_message] + messages
         
         completion = groq.chat.completions.create(
             model=Config.MODEL,
             messages=full_messages,
             temperature=0.7,
-            max_tokens=2048
+            max_tokens=Config.MAX_TOKENS
         )
         
         return completion.choices[0].message.content
 
     def chat_sync(self, user_message: str, conversation_id: str = None) -> dict:
         """Handle a synchronous chat request"""
-        # Get or create conversation
-        conversation = self.get_conversation(conversation_id) if conversation_id else None
-        if not conversation:
-            conversation = self.create_conversation(user_message)
-            conversation_id = conversation["id"]
-
-        # Add user message
-        conversation["messages"].append({
-            "role": "user",
-            "content": user_message
-        })
+        conversation = self._start_turn(user_message, conversation_id)
+        conversation_id = conversation["id"]
         
-        response, search_used = self._process_with_search(
-            user_message,
-            conversation["messages"][:-1]  # Exclude current message for context to avoid duplication if handled internally? 
-            # Actually, _process_with_search takes conversation_messages and ADDS user_message.
-            # My logic in app.py passed `conversation["messages"][:-1]` because it had already appended the message.
-        )
+        cache_key = self._response_cache_key(conversation["messages"])
+        response = self._get_cached_response(cache_key)
+        # Search-backed replies are never cached, so a hit never used search
+        search_used = False
+        if response is None:
+            # _process_with_search appends the user message itself, so pass the history before it
+            response, search_used = self._reply_flight.do(
+                cache_key,
+                self._generate_reply,
+                cache_key,
+                user_message,
+                conversation["messages"][:-1]
+            )
         
         # Save assistant response
         conversation["messages"].append({
@@ -128,10 +339,16 @@ class ChatService:
         return {
             "response": response,
             "conversation_id": conversation_id,
-            "message_id": str(uuid.uuid4()),
+            "message_id": uuid.uuid4().hex,
             "search_used": search_used
         }
 
+    def _generate_reply(self, cache_key: bytes, user_message: str, context_messages: list) -> tuple[str, bool]:
+        """Generate a reply and cache it before waiting callers are released"""
+        response, search_used = self._process_with_search(user_message, context_messages)
+        self._cache_response(cache_key, response, search_used)
+        return response, search_used
+
     def _process_with_search(self, user_message: str, context_messages: list) -> tuple[str, bool]:
         """Process message with potential search"""
         # Initial response
@@ -144,16 +361,7 @@ class ChatService:
             search_results = search_web(search_query)
             
             if search_results:
-                formatted_results = format_search_results(search_results)
-                
-                search_context = f"""The user asked: "{user_message}"
-
-I searched the web for: "{search_query}"
-
-{formatted_results}
-
-Based on these search results, please provide a helpful and accurate response to the user's question. 
-Cite sources when appropriate."""
+                search_context = self._build_search_context(user_message, search_query, search_results)
                 
                 messages_with_search = context_messages + [
                     {"role": "user", "content": search_context}
@@ -166,98 +374,24 @@ Cite sources when appropriate."""
 
     def chat_stream(self, user_message: str, conversation_id: str = None):
         """Generator for streaming chat response"""
-        # Get or create conversation
-        conversation = self.get_conversation(conversation_id) if conversation_id else None
-        if not conversation:
-            conversation = self.create_conversation(user_message)
-            conversation_id = conversation["id"]
-            
-        # Add user message
-        conversation["messages"].append({
-            "role": "user",
-            "content": user_message
-        })
+        yield SSE_PREAMBLE
 
-        groq = self.get_client()
-        full_response = ""
-        search_used = False
+        conversation = self._start_turn(user_message, conversation_id)
+        conversation_id = conversation["id"]
 
         try:
-            # Build messages
-            messages = [{"role": "system", "content": Config.SYSTEM_PROMPT}] + conversation["messages"]
-
-            # 1. Initial Stream
-            stream_response = groq.chat.completions.create(
-                model=Config.MODEL,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=2048,
-                stream=True
-            )
-
-            for chunk in stream_response:
-                if chunk.choices[0].delta.content:
-                    content = chunk.choices[0].delta.content
-                    full_response += content
-                    yield f"data: {json.dumps({'content': content})}\n\n"
-
-            # 2. Check for Search
-            search_query = self._extract_search_query(full_response)
-            
-            if search_query and Config.WEB_SEARCH_ENABLED:
-                yield f"data: {json.dumps({'content': '\\n\\n🔍 *Searching the web...*\\n\\n'})}\n\n"
-                
-                search_results = search_web(search_query)
-                
-                if search_results:
-                    # Clear accumulator
-                    full_response = ""
-                    
-                    formatted_results = format_search_results(search_results)
-                    search_context = f"""The user asked: "{user_message}"
-
-I searched the web for: "{search_query}"
-
-{formatted_results}
-
-Based on these search results, please provide a helpful response. Cite sources."""
-
-                    # New stream with search context
-                    # Note: We must NOT include the original failed/search-requesting assistant response in context
-                    # So we use conversation messages up to the user message, but replace the user message content?
-                    # Or just append the search context as a NEW user message?
-                    # app.py logic was: 
-                    # Use `conversation["messages"]` (which includes user msg) -> 1st pass
-                    # If search -> 
-                    # `search_messages` = [System(SearchPrompt), User(SearchContext)]
-                    # This seems to drop previous context?
-                    # Let's check app.py trace.
-                    # app.py:
-                    # search_messages = [ {"role": "system", ...}, {"role": "user", "content": search_context} ]
-                    # Yes, it drops previous conversation context in the search pass! This might be a bug or feature.
-                    # Ideally it should keep history.
-                    # But for now I will replicate app.py behavior to be safe.
-                    
-                    search_messages = [
-                        {"role": "system", "content": Config.SEARCH_CONTEXT_PROMPT},
-                        {"role": "user", "content": search_context}
-                    ]
-                    
-                    search_stream = groq.chat.completions.create(
-                        model=Config.MODEL,
-                        messages=search_messages,
-                        temperature=0.7,
-                        max_tokens=2048,
-                        stream=True
-                    )
-                    
-                    for chunk in search_stream:
-                        if chunk.choices[0].delta.content:
-                            content = chunk.choices[0].delta.content
-                            full_response += content
-                            yield f"data: {json.dumps({'content': content})}\n\n"
-                    
-                    search_used = True
+            cache_key = self._response_cache_key(conversation["messages"])
+            full_response = self._get_cached_response(cache_key)
+            # Search-backed replies are never cached, so a hit never used search
+            search_used = False
+
+            if full_response is not None:
+                # Replay the cached reply in frame-sized pieces to keep the streaming UX
+                for i in range(0, len(full_response), SSE_COALESCE_CHARS):
+                    yield sse_event({'content': full_response[i:i + SSE_COALESCE_CHARS]})
+            else:
+                full_response, search_used = yield from self._stream_reply(user_message, conversation["messages"])
+                self._cache_response(cache_key, full_response, search_used)
 
             # 3. Save Response
             conversation["messages"].append({
@@ -266,55 +400,150 @@ Based on these search results, please provide a helpful response. Cite sources."
             })
             self.save_conversation(conversation)
             
-            yield f"data: {json.dumps({'done': True, 'conversation_id': conversation_id, 'search_used': search_used})}\n\n"
+            yield sse_event({'done': True, 'conversation_id': conversation_id, 'search_used': search_used})
 
         except Exception as e:
             logger.error(f"Stream error: {e}", exc_info=True)
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield sse_event({'error': str(e)})
+
+    def _stream_reply(self, user_message: str, conversation_messages: list):
+        """
+        Stream the AI reply as SSE frames, running a web search if requested.
+        Returns (full_response, search_used) once the stream is finished.
+        """
+        groq = self.client
+        full_response = ""
+        search_used = False
+
+        # Build messages
+        messages = [SYSTEM_MESSAGE] + conversation_messages
+
+        # 1. Initial Stream
+        stream_response = groq.chat.completions.create(
+            model=Config.MODEL,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=Config.MAX_TOKENS,
+            stream=True
+        )
+
+        for content in coalesce(iter_content(stream_response)):
+            full_response += content
+            yield sse_event({'content': content})
+
+            # Once a complete [SEARCH: ...] request has arrived, stop
+            # generating and start the search right away
+            if (Config.WEB_SEARCH_ENABLED and ']' in content
+                    and self._extract_search_query(full_response)):
+                stream_response.response.close()
+                break
+
+        # 2. Check for Search
+        search_query = self._extract_search_query(full_response)
+        
+        if search_query and Config.WEB_SEARCH_ENABLED:
+            yield sse_event({'content': SEARCHING_NOTICE})
+            
+            search_results = search_web(search_query)
+            
+            if search_results:
+                # Clear accumulator
+                full_response = ""
+                
+                search_context = self._build_search_context(user_message, search_query, search_results)
+
+                # New stream with search context. This pass sends only the search
+                # context (no earlier history or the search-requesting reply),
+                # matching the original app.py behaviour.
+                search_messages = [
+                    SEARCH_SYSTEM_MESSAGE,
+                    {"role": "user", "content": search_context}
+                ]
+                
+                search_stream = groq.chat.completions.create(
+                    model=Config.MODEL,
+                    messages=search_messages,
+                    temperature=0.7,
+                    max_tokens=Config.MAX_TOKENS,
+                    stream=True
+                )
+                
+                for content in coalesce(iter_content(search_stream)):
+                    full_response += content
+                    yield sse_event({'content': content})
+                
+                search_used = True
+
+        return full_response, search_used
+
+    def get_all_conversations(self, limit: int = 50, before: datetime = None, before_id: str = None) -> list:
+        """Get all conversations, most recent first, optionally only those after the (before, before_id) cursor"""
+        cursor = None
+        if before is not None:
+            # Without an id every row at the cursor's timestamp is on an earlier page
+            cursor = (before, before_id) if before_id else (before, "")
 
-    def get_all_conversations(self, limit: int = 50) -> list:
-        """Get all conversations"""
         if self.use_persistent_storage():
-            conversations = get_all_conversations(limit)
-            return [
-                {
+            # Rows already carry only the list columns (id, title, updated_at)
+            rows = get_all_conversations(limit, before, before_id)
+            # Include conversations whose background write hasn't landed yet
+            with self._pending_lock:
+                pending = list(self._pending_saves.values())
+            if not pending:
+                return rows
+            conversations = {conv["id"]: conv for conv in rows}
+            for conv in pending:
+                if cursor is not None and _cursor_key(conv) >= cursor:
+                    # Updated since; it belongs on an earlier page, not here
+                    conversations.pop(conv["id"], None)
+                    continue
+                conversations[conv["id"]] = {
                     "id": conv["id"],
                     "title": conv["title"],
                     "updated_at": conv.get("updated_at")
                 }
-                for conv in conversations
-            ]
+            # Same order as the database query (updated_at desc, id desc); parsed,
+            # since Postgres trims trailing zeros from the fractional seconds
+            conv_list = sorted(conversations.values(), key=_cursor_key, reverse=True)
+            return conv_list[:limit]
         else:
-            # Memory implementation
-            conv_list = [
+            # Memory implementation; saves keep the dict in update order, so
+            # the most recent conversations are read from the end without sorting
+            with self._memory_lock:
+                newest_first = reversed(self.memory_conversations.values())
+                if cursor is not None:
+                    newest_first = (conv for conv in newest_first if _cursor_key(conv) < cursor)
+                recent = list(islice(newest_first, limit))
+            return [
                 {
                     "id": conv["id"],
                     "title": conv["title"],
                     "message_count": len(conv["messages"]),
                     "updated_at": conv.get("updated_at")
                 }
-                for conv in self.memory_conversations.values()
-                if isinstance(conv, dict)
+                for conv in recent
             ]
-            conv_list.sort(key=lambda x: x.get("updated_at", ""), reverse=True)
-            return conv_list[:limit]
 
     def delete_conversation(self, conversation_id: str) -> bool:
         """Delete a conversation"""
         if self.use_persistent_storage():
-            return db_delete_conversation(conversation_id)
+            # Go through the persist thread so the delete lands after any queued save
+            with self._pending_lock:
+                self._pending_saves.pop(conversation_id, None)
+            return self._persist_pool.submit(db_delete_conversation, conversation_id).result()
         else:
-            if conversation_id in self.memory_conversations:
-                del self.memory_conversations[conversation_id]
-                return True
-            return False
+            with self._memory_lock:
+                return self.memory_conversations.pop(conversation_id, None) is not None
 
     def clear_all_conversations(self) -> bool:
         """Clear all conversations"""
         if self.use_persistent_storage():
-            return clear_all_conversations()
+            with self._pending_lock:
+                self._pending_saves.clear()
+            return self._persist_pool.submit(clear_all_conversations).result()
         else:
-            self.memory_conversations.clear()
+            with self._memory_lock:
+                self.memory_conversations.clear()
             return True
 
 # Singleton instance
@@ -3,55 +3,144 @@ Web Search Module for Veritas Chatbot
 Uses DuckDuckGo for free web searches
 """
 
+import re
 import requests
 import logging
-from urllib.parse import quote_plus
+import threading
+from itertools import chain
+from urllib.parse import quote_plus, urlsplit, urlunsplit, parse_qsl, urlencode
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cachetools import TTLCache
+
+from config import Config
+from singleflight import SingleFlight
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Shared session so repeated searches reuse pooled TCP/TLS connections
+_session = requests.Session()
+_session.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+})
+# Room for one kept-alive connection per request thread, plus a short
+# retry on transient gateway errors
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=20,
+    # Status retries only; retrying timeouts would multiply the 10s per-request wait
+    max_retries=Retry(total=2, connect=0, read=0, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+)
+_session.mount('https://', _adapter)
+_session.mount('http://', _adapter)
+
+# Matches an external link and its text in DuckDuckGo lite results
+_RESULT_LINK_RE = re.compile(r'<a\s[^>]*?href="(https?://[^"]+)"[^>]*>([^<]*)')
+
+# Longest snippet passed to the AI; abstracts beyond this add prompt
+# tokens without adding much to the answer
+MAX_SNIPPET_CHARS = 500
+
+# Most bytes of a DuckDuckGo lite results page read before parsing
+MAX_LITE_PAGE_BYTES = 256 * 1024
+
+# Concurrent identical searches share a single DuckDuckGo round-trip
+_search_flight = SingleFlight()
+
+# Recent non-empty results by normalized query; empty results and errors
+# are not cached so a transient failure isn't repeated for the whole TTL
+_search_cache = TTLCache(maxsize=Config.SEARCH_CACHE_SIZE, ttl=Config.SEARCH_CACHE_TTL)
+_search_cache_lock = threading.Lock()
+
+
+def _normalize_query(query: str) -> str:
+    """Normalize a query for use as a dedupe key"""
+    return ' '.join(query.lower().split())
+
+
+def _canonical_url(url: str) -> str:
+    """Normalize a URL for duplicate detection (host case, utm_* params, trailing slash)"""
+    parts = urlsplit(url)
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.startswith('utm_')])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), query, ''))
+
+
+def _dedupe_results(results, max_results: int) -> list[dict]:
+    """Take up to max_results results, dropping any whose URL duplicates an earlier one"""
+    seen = set()
+    unique = []
+    for result in results:
+        if result['url']:
+            key = _canonical_url(result['url'])
+            if key in seen:
+                continue
+            seen.add(key)
+        unique.append(result)
+        if len(unique) >= max_results:
+            break
+    return unique
+
 
 def search_web(query: str, max_results: int = 5) -> list[dict]:
     """
     Search the web using DuckDuckGo's instant answer API.
     Returns a list of search results with title, url, and snippet.
     """
+    key = (_normalize_query(query), max_results)
+    if Config.SEARCH_CACHE_TTL > 0:
+        with _search_cache_lock:
+            cached = _search_cache.get(key)
+        if cached is not None:
+            return list(cached)
+    return list(_search_flight.do(key, _search_web_and_cache, key, query, max_results))
+
+
+def _search_web_and_cache(key: tuple, query: str, max_results: int) -> list[dict]:
+    """Run a search and cache it before concurrent callers are released"""
+    results = _search_web(query, max_results)
+    if results and Config.SEARCH_CACHE_TTL > 0:
+        with _search_cache_lock:
+            _search_cache[key] = results
+    return results
+
+
+def _search_web(query: str, max_results: int = 5) -> list[dict]:
+    """Run a DuckDuckGo search (see search_web)"""
     try:
-        # Use DuckDuckGo HTML search (more reliable for general queries)
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
         # Try DuckDuckGo instant answer API first
         api_url = f"https://api.duckduckgo.com/?q={quote_plus(query)}&format=json&no_html=1"
-        response = requests.get(api_url, headers=headers, timeout=10)
+        response = _session.get(api_url, timeout=10)
         data = response.json()
         
-        results = []
+        abstract = []
         
         # Get abstract (main answer)
         if data.get('Abstract'):
-            results.append({
+            abstract.append({
                 'title': data.get('Heading', 'Result'),
                 'url': data.get('AbstractURL', ''),
                 'snippet': data.get('Abstract', '')
             })
         
-        # Get related topics
-        for topic in data.get('RelatedTopics', [])[:max_results]:
-            if isinstance(topic, dict) and 'Text' in topic:
-                results.append({
-                    'title': topic.get('Text', '')[:100],
-                    'url': topic.get('FirstURL', ''),
-                    'snippet': topic.get('Text', '')
-                })
+        # Get related topics; built lazily so collection stops at max_results
+        topics = (
+            {
+                'title': topic.get('Text', '')[:100],
+                'url': topic.get('FirstURL', ''),
+                'snippet': topic.get('Text', '')
+            }
+            for topic in data.get('RelatedTopics', [])
+            if isinstance(topic, dict) and 'Text' in topic
+        )
+        results = _dedupe_results(chain(abstract, topics), max_results)
         
         # If no results from instant answer, try a different approach
         if not results:
             # Use DuckDuckGo lite for scraping (backup)
             results = _search_ddg_lite(query, max_results)
         
-        return results[:max_results]
+        return results
         
     except Exception as e:
         logger.error(f"Search error: {e}", exc_info=True)
@@ -61,39 +150,39 @@ def search_web(query: str, max_results: int = 5) -> list[dict]:
 def _search_ddg_lite(query: str, max_results: int = 5) -> list[dict]:
     """Backup search using DuckDuckGo lite version"""
     try:
-        from html.parser import HTMLParser
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
         url = f"https://lite.duckduckgo.com/lite/?q={quote_plus(query)}"
-        response = requests.get(url, headers=headers, timeout=10)
         
-        # Simple parsing - extract links and text
+        # Stream the page and stop at a fixed cap; the results we keep are
+        # near the top, so there's no need to buffer an unbounded body
+        page = bytearray()
+        with _session.get(url, timeout=10, stream=True) as response:
+            for chunk in response.iter_content(16384):
+                page += chunk
+                if len(page) >= MAX_LITE_PAGE_BYTES:
+                    break
+            html = page.decode(response.encoding or 'utf-8', errors='replace')
+        
+        # Simple parsing - one scan over the page for external links and their text
         results = []
-        lines = response.text.split('\n')
+        seen = set()
         
-        for i, line in enumerate(lines):
-            if 'class="result-link"' in line or 'href="http' in line:
-                # Extract URL
-                import re
-                url_match = re.search(r'href="([^"]+)"', line)
-                if url_match:
-                    result_url = url_match.group(1)
-                    if result_url.startswith('http') and 'duckduckgo' not in result_url:
-                        # Try to get title from same or next line
-                        title_match = re.search(r'>([^<]+)</a>', line)
-                        title = title_match.group(1) if title_match else result_url[:50]
-                        
-                        results.append({
-                            'title': title,
-                            'url': result_url,
-                            'snippet': ''
-                        })
-                        
-                        if len(results) >= max_results:
-                            break
+        for match in _RESULT_LINK_RE.finditer(html):
+            result_url, title = match.groups()
+            if 'duckduckgo' in result_url:
+                continue
+            key = _canonical_url(result_url)
+            if key in seen:
+                continue
+            seen.add(key)
+            
+            results.append({
+                'title': title.strip() or result_url[:50],
+                'url': result_url,
+                'snippet': ''
+            })
+            
+            if len(results) >= max_results:
+                break
         
         return results
         
@@ -107,13 +196,14 @@ def format_search_results(results: list[dict]) -> str:
     if not results:
         return "No search results found."
     
-    formatted = "**Web Search Results:**\n\n"
+    lines = ["**Web Search Results:**", ""]
     for i, result in enumerate(results, 1):
-        formatted += f"{i}. **{result['title']}**\n"
+        lines.append(f"{i}. **{result['title']}**")
         if result['url']:
-            formatted += f"   Link: {result['url']}\n"
+            lines.append(f"   Link: {result['url']}")
         if result['snippet']:
-            formatted += f"   {result['snippet']}\n"
-        formatted += "\n"
+            lines.append(f"   {result['snippet'][:MAX_SNIPPET_CHARS]}")
+        lines.append("")
     
-    return formatted
+    # Join once instead of growing a string per line
+    return "\n".join(lines) + "\n"
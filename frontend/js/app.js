@@ -53,13 +53,16 @@ async function sendMessageStream(message, conversationId, onChunk, onDone, signa
   const reader = response.body.getReader();
   const decoder = new TextDecoder();
   let fullResponse = '';
+  let buffer = '';
 
   while (true) {
     const { done, value } = await reader.read();
     if (done) break;
 
-    const chunk = decoder.decode(value);
-    const lines = chunk.split('\n');
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    // Keep a trailing partial line until the rest of it arrives
+    buffer = lines.pop();
 
     for (const line of lines) {
       if (line.startsWith('data: ')) {